@@ -22,14 +22,27 @@ from sklearn.tree import DecisionTreeClassifier
 #Chemins vers les répertoires d'images
 mer = "./Data/Mer"
 ailleurs = "./Data/Ailleurs"
+
+#Tailles (côté en pixels) testées pour la représentation vectorielle
+tailles = range(50,200,50)
+#Vecteurs de pixels de chaque taille, extraits au premier appel de chargementVecteurs
+vecteurs = {}
+
+def chargementVecteurs(npix):
+    "Renvoie les vecteurs de pixels de côté npix et les classes associées, en ne décodant les images qu'une fois pour toutes les tailles"
+    if not vecteurs:
+        _, data, target = utils.chargementPyramideImages(mer,ailleurs,1,-1,tailles,histogramme=False,debut=1)
+        vecteurs.update(data)
+        vecteurs['target'] = target
+    return vecteurs[npix], vecteurs['target']
  
 def perceptron_vecteur():
     "Interprétation des images comme vecteurs de pixels et classification via le Perceptron"
     alphas = np.arange(0.01,1.01,0.1)
     best=np.zeros(5)
     
-    for npix in range(50,200,50):
-        _, data, target, _ = utils.chargementVecteursImages(mer,ailleurs,1,-1,npix)
+    for npix in tailles:
+        data, target = chargementVecteurs(npix)
         X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
         
         
@@ -39,14 +52,8 @@ def perceptron_vecteur():
                 
                 p = Perceptron(alpha=a, n_iter=iterations, random_state=random.seed(), n_jobs=-1)
                 
-                #X_train, etc, sont des tableaux à 3 dimensiosn par défaut, (93,1,30000) par exemple, qu'il faut remmener en 2 dimensions
-                x1=np.array(X_train)
-                x1 = np.reshape(x1, (x1.shape[0],x1.shape[2]))
-                x2=np.array(X_test)
-                x2 = np.reshape(x2, (x2.shape[0],x2.shape[2]))
-                
-                p.fit(X=x1, y=Y_train)
-                score = p.score(x2,Y_test)
+                p.fit(X=X_train, y=Y_train)
+                score = p.score(X_test,Y_test)
                 
                 end_time = time.time()
                 if score>best[0]:
@@ -63,8 +70,8 @@ def perceptron_noyau_vecteur():
     alphas = np.arange(0.01,1.01,0.5)
     best=np.zeros(6)
     
-    for npix in range(50,200,50):
-        _, data, target, _ = utils.chargementVecteursImages(mer,ailleurs,1,-1,npix)
+    for npix in tailles:
+        data, target = chargementVecteurs(npix)
         X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
         
         
@@ -72,13 +79,8 @@ def perceptron_noyau_vecteur():
             for a in alphas:
                 start_time = time.time()
                 
-                x1=np.array(X_train)
-                x1 = np.reshape(x1, (x1.shape[0],x1.shape[2]))
-                x2=np.array(X_test)
-                x2 = np.reshape(x2, (x2.shape[0],x2.shape[2]))
-                
-                p = kp.learnKernelPerceptron(x1, Y_train, kp.noyauGaussien, a)
-                score = 1 - (kp.predictSet(p, kp.noyauGaussien, a, x2, Y_test, False)/len(Y_test))
+                p = kp.learnKernelPerceptronModele(X_train, Y_train, kp.noyauGaussien, a, mode='gram', dtype=np.float32)
+                score = 1 - (kp.predictSetModele(p, X_test, Y_test)/len(Y_test))
                 
                 end_time = time.time()
                 if score>best[0]:
@@ -91,13 +93,8 @@ def perceptron_noyau_vecteur():
                     
                 """start_time = time.time()
                 
-                x1=np.array(X_train)
-                x1 = np.reshape(x1, (x1.shape[0],x1.shape[2]))
-                x2=np.array(X_test)
-                x2 = np.reshape(x2, (x2.shape[0],x2.shape[2]))
-                
-                p = kp.learnKernelPerceptron(x1, Y_train, kp.noyauPolynomial, a)
-                score = 1 - (kp.predictSet(p, kp.noyauPolynomial, a, x2, Y_test, False)/len(Y_test))
+                p = kp.learnKernelPerceptronModele(X_train, Y_train, kp.noyauPolynomial, a, mode='gram', dtype=np.float32)
+                score = 1 - (kp.predictSetModele(p, X_test, Y_test)/len(Y_test))
                 
                 end_time = time.time()
                 if score>best[0]:
@@ -114,21 +111,16 @@ def svm_vecteur():
     "Interprétation des images comme vecteurs de pixels et classification via le SVM"
     best=np.zeros(4)
     
-    for npix in range(50,200,50):
-        _, data, target, _ = utils.chargementVecteursImages(mer,ailleurs,1,-1,npix)
+    for npix in tailles:
+        data, target = chargementVecteurs(npix)
         X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
         
         for iterations in range(250,1000,250):
             start_time = time.time()
             svc = LinearSVC(random_state=random.seed(), max_iter=iterations)
             
-            x1=np.array(X_train)
-            x1 = np.reshape(x1, (x1.shape[0],x1.shape[2]))
-            x2=np.array(X_test)
-            x2 = np.reshape(x2, (x2.shape[0],x2.shape[2]))
-                
-            svc.fit(X=x1, y=Y_train)
-            score = svc.score(x2,Y_test)
+            svc.fit(X=X_train, y=Y_train)
+            score = svc.score(X_test,Y_test)
                 
             end_time = time.time()
             if score>best[0]:
@@ -143,8 +135,8 @@ def kppv_vecteur():
     "Interprétation des images comme vecteurs de pixels et classification via les k plus proches voisins"
     best = np.zeros(6)    
     
-    for npix in range(50,200,50):
-        _, data, target, _ = utils.chargementVecteursImages(mer,ailleurs,1,-1,npix)
+    for npix in tailles:
+        data, target = chargementVecteurs(npix)
         X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
         
         for iterations in range(250,1000,250):
@@ -153,13 +145,8 @@ def kppv_vecteur():
                     start_time = time.time()
                     kppv = KNeighborsClassifier(n_neighbors=n, p=param, n_jobs=-1)
                     
-                    x1=np.array(X_train)
-                    x1 = np.reshape(x1, (x1.shape[0],x1.shape[2]))
-                    x2=np.array(X_test)
-                    x2 = np.reshape(x2, (x2.shape[0],x2.shape[2]))
-                        
-                    kppv.fit(X=x1, y=Y_train)
-                    score = kppv.score(x2,Y_test)
+                    kppv.fit(X=X_train, y=Y_train)
+                    score = kppv.score(X_test,Y_test)
                         
                     end_time = time.time()
                     if score>best[0]:
@@ -181,21 +168,16 @@ def arbre_decision_vecteur():
     nom = ["gini","entr"]    
     depths = [10,200,1000]
     
-    for npix in range(50,200,50):
-        _, data, target, _ = utils.chargementVecteursImages(mer,ailleurs,1,-1,npix)
+    for npix in tailles:
+        data, target = chargementVecteurs(npix)
         X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
         for d in depths:
             for m in range(1, 5, 2):        
                 start_time = time.time()
                 ad = DecisionTreeClassifier(max_depth=d, min_samples_leaf=m, random_state=random.seed(), presort=True)
                 
-                x1 = np.array(X_train)
-                x1 = np.reshape(x1, (x1.shape[0], x1.shape[2]))
-                x2 = np.array(X_test)
-                x2 = np.reshape(x2, (x2.shape[0], x2.shape[2]))
-                    
-                ad.fit(X=x1, y=Y_train)
-                score = ad.score(x2, Y_test)
+                ad.fit(X=X_train, y=Y_train)
+                score = ad.score(X_test, Y_test)
                     
                 end_time = time.time()
                 if score > best[0]:
@@ -209,13 +191,8 @@ def arbre_decision_vecteur():
                 start_time = time.time()
                 ad = DecisionTreeClassifier(criterion="entropy", max_depth=d, min_samples_leaf=m, random_state=random.seed(), presort=True)
                 
-                x1 = np.array(X_train)
-                x1 = np.reshape(x1, (x1.shape[0], x1.shape[2]))
-                x2 = np.array(X_test)
-                x2 = np.reshape(x2, (x2.shape[0], x2.shape[2]))
-                    
-                ad.fit(X=x1, y=Y_train)
-                score = ad.score(x2, Y_test)
+                ad.fit(X=X_train, y=Y_train)
+                score = ad.score(X_test, Y_test)
                     
                 end_time = time.time()
                 if score > best[0]:
@@ -233,7 +210,7 @@ def perceptron_histo():
     alphas = np.arange(0.01,1.01,0.1)
     best=np.zeros(4)
     
-    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1)
+    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1,dtype=np.float64)
     X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
     
     
@@ -243,11 +220,8 @@ def perceptron_histo():
             
             p = Perceptron(alpha=a, n_iter=iterations, random_state=random.seed(), n_jobs=-1)
             
-            x1=np.array(X_train)
-            x2=np.array(X_test)
-            
-            p.fit(X=x1, y=Y_train)
-            score = p.score(x2,Y_test)
+            p.fit(X=X_train, y=Y_train)
+            score = p.score(X_test,Y_test)
             
             end_time = time.time()
             if score>best[0]:
@@ -263,7 +237,7 @@ def perceptron_noyau_histo():
     alphas = np.arange(0.01,1.01,0.5)
     best=np.zeros(5)
     
-    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1)
+    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1,dtype=np.float64)
     X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
     
     
@@ -271,11 +245,8 @@ def perceptron_noyau_histo():
         for a in alphas:
             start_time = time.time()
             
-            x1=np.array(X_train)
-            x2=np.array(X_test)
-            
-            p = kp.learnKernelPerceptron(x1, Y_train, kp.noyauGaussien, a)
-            score = 1 - (kp.predictSet(p, kp.noyauGaussien, a, x2, Y_test, False)/len(Y_test))
+            p = kp.learnKernelPerceptronModele(X_train, Y_train, kp.noyauGaussien, a, mode='gram')
+            score = 1 - (kp.predictSetModele(p, X_test, Y_test)/len(Y_test))
             
             end_time = time.time()
             if score>best[0]:
@@ -287,13 +258,8 @@ def perceptron_noyau_histo():
                 
             """start_time = time.time()
             
-            x1=np.array(X_train)
-            x1 = np.reshape(x1, (x1.shape[0],x1.shape[2]))
-            x2=np.array(X_test)
-            x2 = np.reshape(x2, (x2.shape[0],x2.shape[2]))
-            
-            p = kp.learnKernelPerceptron(x1, Y_train, kp.noyauPolynomial, a)
-            score = 1 - (kp.predictSet(p, kp.noyauPolynomial, a, x2, Y_test, False)/len(Y_test))
+            p = kp.learnKernelPerceptronModele(X_train, Y_train, kp.noyauPolynomial, a, mode='gram')
+            score = 1 - (kp.predictSetModele(p, X_test, Y_test)/len(Y_test))
             
             end_time = time.time()
             if score>best[0]:
@@ -310,18 +276,15 @@ def svm_histo():
     "Interprétation des images comme histogrammes de couleurs et classification via le SVM"
     best=np.zeros(3)
     
-    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1)
+    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1,dtype=np.float64)
     X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
     
     for iterations in range(250,1000,250):
         start_time = time.time()
         svc = LinearSVC(random_state=random.seed(), max_iter=iterations)
         
-        x1=np.array(X_train)
-        x2=np.array(X_test)
-            
-        svc.fit(X=x1, y=Y_train)
-        score = svc.score(x2,Y_test)
+        svc.fit(X=X_train, y=Y_train)
+        score = svc.score(X_test,Y_test)
             
         end_time = time.time()
         if score>best[0]:
@@ -335,7 +298,7 @@ def kppv_histo():
     "Interprétation des images comme histogrammes de couleurs et classification via les k plus proches voisins"
     best = np.zeros(5)    
     
-    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1)
+    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1,dtype=np.float64)
     X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
     
     for iterations in range(250,1000,250):
@@ -344,11 +307,8 @@ def kppv_histo():
                 start_time = time.time()
                 kppv = KNeighborsClassifier(n_neighbors=n, p=param, n_jobs=-1)
                 
-                x1=np.array(X_train)
-                x2=np.array(X_test)
-                    
-                kppv.fit(X=x1, y=Y_train)
-                score = kppv.score(x2,Y_test)
+                kppv.fit(X=X_train, y=Y_train)
+                score = kppv.score(X_test,Y_test)
                     
                 end_time = time.time()
                 if score>best[0]:
@@ -367,18 +327,15 @@ def arbre_decision_histo():
     nom = ["gini","entr"]    
     depths = [10,200,1000]
     
-    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1)
+    _, data, target, _ = utils.chargementHistogrammesImages(mer,ailleurs,1,-1,dtype=np.float64)
     X_train,X_test,Y_train,Y_test=train_test_split(data,target,test_size=0.3,random_state=random.seed())
     for d in depths:
         for m in range(1, 5, 2):        
             start_time = time.time()
             ad = DecisionTreeClassifier(max_depth=d, min_samples_leaf=m, random_state=random.seed(), presort=True)
             
-            x1 = np.array(X_train)
-            x2 = np.array(X_test)
-                
-            ad.fit(X=x1, y=Y_train)
-            score = ad.score(x2, Y_test)
+            ad.fit(X=X_train, y=Y_train)
+            score = ad.score(X_test, Y_test)
                 
             end_time = time.time()
             if score > best[0]:
@@ -391,11 +348,8 @@ def arbre_decision_histo():
             start_time = time.time()
             ad = DecisionTreeClassifier(criterion="entropy", max_depth=d, min_samples_leaf=m, random_state=random.seed(), presort=True)
             
-            x1 = np.array(X_train)
-            x2 = np.array(X_test)
-                
-            ad.fit(X=x1, y=Y_train)
-            score = ad.score(x2, Y_test)
+            ad.fit(X=X_train, y=Y_train)
+            score = ad.score(X_test, Y_test)
                 
             end_time = time.time()
             if score > best[0]:
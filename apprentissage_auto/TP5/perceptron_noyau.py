@@ -10,6 +10,7 @@
 #imports
 import numpy as np
 import math
+from functools import partial
 from pylab import rand
 
 def genererDonnees(n):
@@ -47,6 +48,48 @@ def noyauPolynomial(x1,x2,k):
     y = math.pow(y,k)
     return y
 
+#2.3) Calcul matriciel des noyaux entre tous les vecteurs de 2 blocs
+def noyauGaussienMatrice(A,B,sigma,dtype=np.float64,normesA=None,normesB=None):
+    """Calcule la matrice K[i,j] = noyauGaussien(A[i],B[j],sigma) pour toutes les lignes de A et de B, via ||a||²+||b||²-2a.b et un produit matriciel
+    normesA, normesB : carrés des normes des lignes de A et de B, s'ils sont déjà connus"""
+    A = np.atleast_2d(np.asarray(A, dtype))
+    B = np.atleast_2d(np.asarray(B, dtype))
+    if A.shape[1] != B.shape[1]:
+        raise Exception("Vous tentez de calculer le noyau gaussien de vecteurs de taille différente.")
+    K = np.dot(A, B.T)
+    K *= -2
+    K += (np.einsum('ij,ij->i', A, A) if normesA is None else normesA)[:,None]
+    K += (np.einsum('ij,ij->i', B, B) if normesB is None else normesB)[None,:]
+    #les erreurs d'arrondi peuvent rendre négatives des distances nulles
+    np.maximum(K, 0, out=K)
+    K *= -1.0/(sigma*sigma)
+    return np.exp(K, out=K)
+
+def noyauPolynomialMatrice(A,B,k,dtype=np.float64):
+    "Calcule la matrice K[i,j] = noyauPolynomial(A[i],B[j],k) pour toutes les lignes de A et de B, via un produit matriciel"
+    A = np.atleast_2d(np.asarray(A, dtype))
+    B = np.atleast_2d(np.asarray(B, dtype))
+    if A.shape[1] != B.shape[1]:
+        raise Exception("Vous tentez de calculer le noyau polynomial de vecteurs de taille différente.")
+    K = np.dot(A, B.T)
+    K += 1
+    return np.power(K, k, out=K)
+
+#Version matricielle de chaque noyau
+NOYAUX_MATRICIELS = {noyauGaussien: noyauGaussienMatrice, noyauPolynomial: noyauPolynomialMatrice}
+
+def noyauMatrice(kernel,A,B,h,dtype=np.float64):
+    "Calcule la matrice K[i,j] = kernel(A[i],B[j],h), par la version matricielle du noyau si elle existe, par un appel par paire sinon"
+    if kernel in NOYAUX_MATRICIELS:
+        return NOYAUX_MATRICIELS[kernel](A,B,h,dtype)
+    A = np.atleast_2d(np.asarray(A, dtype))
+    B = np.atleast_2d(np.asarray(B, dtype))
+    K = np.empty((A.shape[0], B.shape[0]), dtype)
+    for i in range(0,A.shape[0]):
+        for j in range(0,B.shape[0]):
+            K[i,j] = kernel(A[i],B[j],h)
+    return K
+
 #3.1) Création et apprentissage d'un perceptron à noyau
 def signe(y):
     "Retourne le signe de y ou 0 si y est nul"
@@ -54,28 +97,204 @@ def signe(y):
     if y>0:
         ret = 1
     if y<0:
-        ret = 0
+        ret = -1
     return ret
 
-def learnKernelPerceptron(data,target,kernel,h):
-    dataExt = np.matrix([np.append(d,1) for d in data])
-    alpha = np.zeros(data.shape[0])
-    
-    #n sera le nombre d'itérations de la boucle externe : j'ai choisi un nombre d'itérations proportionnel à n*d
-    #j'ai choisi comme coefficient 1/700 de manière arbitraire pour des soucis de performance
-    n = data.shape[0]
-    if len(data.shape)>1:
-        n*=data.shape[1]
-    n=10
-    
-    for c in range(0,n):
-        for i in  range(0,data.shape[0]):
+def matriceGram(data,kernel,h,dtype=np.float64):
+    "Calcule la matrice de Gram K[i,j] = kernel(data[i],data[j],h) de toutes les paires de lignes de data (voir noyauMatrice)"
+    if kernel in NOYAUX_MATRICIELS:
+        return noyauMatrice(kernel,data,data,h,dtype)
+    #noyau quelconque : un appel par paire, en exploitant la symétrie
+    data = np.asarray(data, dtype)
+    K = np.empty((data.shape[0], data.shape[0]), dtype)
+    for i in range(0,data.shape[0]):
+        for j in range(0,i+1):
+            K[i,j] = K[j,i] = kernel(data[i],data[j],h)
+    return K
+
+def epoqueNaive(alpha,dataExt,target,kernel,h):
+    "Renvoie la fonction réalisant une époque d'apprentissage de alpha, et renvoyant son nombre d'erreurs, en recalculant le noyau de chaque paire d'exemples"
+    def epoque():
+        erreurs = 0
+        for i in  range(0,dataExt.shape[0]):
             pred = 0
-            for j in range(0,data.shape[0]):
+            for j in range(0,dataExt.shape[0]):
                 pred += alpha[j]*target[j]*kernel(dataExt[i],dataExt[j],h)
 
             if signe(pred) != target[i]:
                 alpha[i] += 1
+                erreurs += 1
+        return erreurs
+    return epoque
+
+def epoqueGram(alpha,K,target):
+    "Renvoie la fonction réalisant une époque d'apprentissage de alpha, et renvoyant son nombre d'erreurs, à partir de la matrice de Gram K calculée une seule fois"
+    target = np.asarray(target)
+    #coef[j] = alpha[j]*target[j], tenu à jour à chaque erreur
+    coef = alpha*target
+    def epoque():
+        erreurs = 0
+        for i in range(0,K.shape[0]):
+            if signe(np.dot(K[i],coef)) != target[i]:
+                alpha[i] += 1
+                coef[i] += target[i]
+                erreurs += 1
+        return erreurs
+    return epoque
+
+def blocsGram(data,kernel,h,taille,dtype=np.float64):
+    "Génère les couples (debut, K[debut:debut+taille]) des blocs de taille lignes de la matrice de Gram de data, sans jamais la calculer en entier"
+    #conversion de data et normes de ses lignes calculées une seule fois pour tous les blocs
+    data = np.asarray(data, dtype)
+    if kernel is noyauGaussien:
+        normes = np.einsum('ij,ij->i', data, data)
+    for debut in range(0,data.shape[0],taille):
+        bloc = data[debut:debut+taille]
+        if kernel is noyauGaussien:
+            yield debut, noyauGaussienMatrice(bloc,data,h,dtype,normes[debut:debut+taille],normes)
+        else:
+            yield debut, noyauMatrice(kernel,bloc,data,h,dtype)
+
+def epoqueBlocs(alpha,dataExt,target,kernel,h,memoire,dtype=np.float64,fichier=None):
+    """Renvoie la fonction réalisant une époque d'apprentissage de alpha, et renvoyant son nombre d'erreurs, en parcourant la matrice de Gram par blocs de lignes.
+    memoire : taille maximale d'un bloc en octets
+    fichier : si None, les blocs sont recalculés à chaque époque ; sinon la matrice est calculée une seule fois,
+    bloc par bloc, dans ce fichier .npy projeté en mémoire, puis relue bloc par bloc à chaque époque"""
+    data = np.asarray(dataExt)
+    target = np.asarray(target)
+    n = data.shape[0]
+    taille = int(max(1, memoire // (n*np.dtype(dtype).itemsize)))
+    coef = alpha*target
+    if fichier is None:
+        def blocs():
+            return blocsGram(data,kernel,h,taille,dtype)
+    else:
+        K = np.lib.format.open_memmap(fichier,'w+',dtype,(n,n))
+        for debut,bloc in blocsGram(data,kernel,h,taille,dtype):
+            K[debut:debut+bloc.shape[0]] = bloc
+        K.flush()
+        def blocs():
+            for debut in range(0,n,taille):
+                yield debut, np.asarray(K[debut:debut+taille])
+    def epoque():
+        erreurs = 0
+        for debut,bloc in blocs():
+            for i in range(0,bloc.shape[0]):
+                if signe(np.dot(bloc[i],coef)) != target[debut+i]:
+                    alpha[debut+i] += 1
+                    coef[debut+i] += target[debut+i]
+                    erreurs += 1
+        return erreurs
+    return epoque
+
+def epoqueIncrementale(alpha,dataExt,target,kernel,h,dtype=np.float64,budget=None,politique='ancien',graine=None):
+    """Renvoie la fonction réalisant une époque d'apprentissage de alpha, et renvoyant son nombre d'erreurs, en tenant à jour les valeurs de décision
+    f[i] = somme des alpha[j]*target[j]*kernel(x_i,x_j,h) : lorsque alpha[i] augmente, seule la colonne de noyau de x_i est calculée et ajoutée à f.
+    Une époque coûte ainsi n noyaux par erreur au lieu de n² noyaux.
+    budget : nombre maximal de vecteurs de support (alpha non nul). Lorsqu'une erreur sur un nouvel exemple le dépasserait,
+    un vecteur de support est d'abord retiré (son alpha remis à 0) selon politique :
+    'ancien' le plus anciennement ajouté, 'petit' celui de plus petit alpha, 'aleatoire' un tiré au hasard (avec la graine donnée)"""
+    if politique not in ('ancien','petit','aleatoire'):
+        raise Exception("Politique de retrait inconnue : {}".format(politique))
+    #conversion unique : chaque erreur calcule une colonne de noyau sur toutes les lignes
+    data = np.asarray(dataExt, dtype)
+    target = np.asarray(target)
+    f = np.zeros(data.shape[0])
+    sv = np.flatnonzero(alpha)
+    if len(sv):
+        f += np.dot(noyauMatrice(kernel,data,data[sv],h,dtype),alpha[sv]*target[sv])
+    #vecteurs de support, dans leur ordre d'ajout
+    supports = list(sv)
+    hasard = np.random.RandomState(graine)
+    def retirer():
+        if politique == 'ancien':
+            j = supports[0]
+        elif politique == 'petit':
+            j = supports[int(np.argmin(alpha[supports]))]
+        else:
+            j = supports[hasard.randint(len(supports))]
+        supports.remove(j)
+        f[:] -= alpha[j]*target[j]*noyauMatrice(kernel,data,data[j:j+1],h,dtype)[:,0]
+        alpha[j] = 0
+    def epoque():
+        erreurs = 0
+        for i in range(0,data.shape[0]):
+            if signe(f[i]) != target[i]:
+                if alpha[i] == 0:
+                    if budget is not None and len(supports) >= budget:
+                        retirer()
+                    supports.append(i)
+                alpha[i] += 1
+                f[:] += target[i]*noyauMatrice(kernel,data,data[i:i+1],h,dtype)[:,0]
+                erreurs += 1
+        return erreurs
+    return epoque
+
+def learnKernelPerceptron(data,target,kernel,h,mode='naif',dtype=np.float64,memoire=None,fichierGram=None,
+                          epoques=10,arretSansErreur=True,validation=None,patience=None,details=False,
+                          budget=None,politique='ancien',graine=None):
+    """Apprend les coefficients alpha d'un perceptron à noyau.
+    mode : 'naif' recalcule le noyau de chaque paire d'exemples à chaque époque,
+    'gram' calcule une seule fois la matrice de Gram (vectorisée pour les noyaux de ce module),
+    'blocs' parcourt la matrice de Gram par blocs de lignes d'au plus memoire octets (voir epoqueBlocs),
+    'incremental' ne calcule que les colonnes de noyau des exemples mal classés (voir epoqueIncrementale)
+    dtype : hors mode 'naif', type (np.float32 ou np.float64) dans lequel sont calculés les noyaux ; les exemples restent dans leur type
+    d'origine (ex. np.uint8) et ne sont convertis qu'au calcul des noyaux
+    fichierGram : en mode 'blocs', fichier .npy où stocker la matrice de Gram plutôt que de la recalculer à chaque époque
+    epoques : nombre maximal d'époques
+    arretSansErreur : arrête l'apprentissage après une époque sans erreur (les suivantes ne changeraient plus alpha)
+    validation : couple (data, target) d'exemples de validation, évalués après chaque époque ; le alpha renvoyé est alors
+    celui de l'époque de plus petite erreur de validation
+    patience : avec validation, arrête l'apprentissage lorsque l'erreur de validation ne s'est pas améliorée depuis patience époques
+    details : si vrai, renvoie (alpha, nombre d'époques effectuées, liste des erreurs d'apprentissage de chaque époque)
+    budget, politique, graine : en mode 'incremental', nombre maximal de vecteurs de support et politique de retrait (voir epoqueIncrementale)"""
+    if mode == 'naif':
+        dataExt = np.matrix([np.append(d,1) for d in data])
+    else:
+        dataExt = etendre(data)
+    alpha = np.zeros(data.shape[0])
+    
+    if patience is not None and validation is None:
+        raise Exception("L'arrêt anticipé (patience) nécessite des exemples de validation.")
+    if budget is not None and mode != 'incremental':
+        raise Exception("Le budget de vecteurs de support nécessite le mode 'incremental'.")
+    if budget is not None and budget < 1:
+        raise Exception("Le budget de vecteurs de support doit être au moins 1 : {}".format(budget))
+    if mode == 'naif':
+        epoque = epoqueNaive(alpha,dataExt,target,kernel,h)
+    elif mode == 'gram':
+        epoque = epoqueGram(alpha,matriceGram(dataExt,kernel,h,dtype),target)
+    elif mode == 'blocs':
+        if memoire is None:
+            raise Exception("Le mode 'blocs' nécessite un budget mémoire.")
+        epoque = epoqueBlocs(alpha,dataExt,target,kernel,h,memoire,dtype,fichierGram)
+    elif mode == 'incremental':
+        epoque = epoqueIncrementale(alpha,dataExt,target,kernel,h,dtype,budget,politique,graine)
+    else:
+        raise Exception("Mode d'apprentissage inconnu : {}".format(mode))
+    
+    erreurs = []
+    meilleur = None
+    attente = 0
+    for c in range(0,epoques):
+        erreurs.append(epoque())
+        if validation is not None:
+            modele = PerceptronNoyau(alpha,data,target,kernel,h,dtype)
+            err = predictSetModele(modele,validation[0],validation[1])
+            if meilleur is None or err < meilleur[0]:
+                meilleur = (err, alpha.copy())
+                attente = 0
+            else:
+                attente += 1
+            if patience is not None and attente >= patience:
+                break
+        if arretSansErreur and erreurs[-1] == 0:
+            break
+    #quelle que soit la raison de l'arrêt, on garde la meilleure époque en validation
+    if meilleur is not None:
+        alpha[:] = meilleur[1]
+    if details:
+        return alpha, len(erreurs), erreurs
     return alpha
 
 #3.2) Prédiction de la classe d'un exemple avec un perceptron donnné
@@ -98,6 +317,186 @@ def predictSet(kp,kernel,h,data,target,display):
     return err
 
 
+#3.4) Modèle creux ne conservant que les vecteurs de support
+def etendre(data):
+    "Ajoute à chaque ligne de data la composante constante 1 utilisée par learnKernelPerceptron"
+    data = np.atleast_2d(np.asarray(data))
+    return np.hstack([data, np.ones((data.shape[0],1), data.dtype)])
+
+class PerceptronNoyau(object):
+    "Perceptron à noyau réduit à ses vecteurs de support (exemples d'apprentissage de alpha non nul) : le coût d'une prédiction dépend de leur nombre, pas de la taille de l'ensemble d'apprentissage"
+
+    def __init__(self,alpha,data,target,kernel,h,dtype=np.float64):
+        "Construit le modèle à partir des coefficients alpha appris par learnKernelPerceptron sur data et target"
+        alpha = np.asarray(alpha)
+        sv = np.flatnonzero(alpha)
+        self.supports = np.asarray(etendre(np.asarray(data)[sv]), dtype)
+        self.alpha = alpha[sv]
+        self.target = np.asarray(target)[sv]
+        self.kernel = kernel
+        self.h = h
+        self.dtype = dtype
+
+    def __len__(self):
+        return self.supports.shape[0]
+
+    def decision(self,data,tailleLot=256):
+        "Renvoie la valeur de décision de chaque ligne de data (exemples non étendus), calculée par lots de tailleLot lignes : un bloc de noyaux lot x vecteurs de support et un produit matrice-vecteur par lot"
+        data = np.atleast_2d(np.asarray(data))
+        coef = self.alpha*self.target
+        pred = np.zeros(data.shape[0])
+        if len(self) == 0:
+            return pred
+        for debut in range(0,data.shape[0],tailleLot):
+            K = noyauMatrice(self.kernel,etendre(data[debut:debut+tailleLot]),self.supports,self.h,self.dtype)
+            pred[debut:debut+K.shape[0]] = np.dot(K,coef)
+        return pred
+
+    def predire(self,data,tailleLot=256):
+        "Renvoie la classe prédite (voir signe) de chaque ligne de data"
+        return np.array([signe(pred) for pred in self.decision(data,tailleLot)])
+
+def learnKernelPerceptronModele(data,target,kernel,h,**options):
+    "Apprend un perceptron à noyau (voir learnKernelPerceptron, dont options reprend les paramètres) et renvoie le modèle creux correspondant"
+    options['details'] = True
+    alpha, epoques, erreurs = learnKernelPerceptron(data,target,kernel,h,**options)
+    modele = PerceptronNoyau(alpha,data,target,kernel,h,options.get('dtype',np.float64))
+    #nombre d'époques effectuées et erreurs d'apprentissage de chacune
+    modele.epoques = epoques
+    modele.erreurs = erreurs
+    return modele
+
+def predictSetModele(modele,data,target,display=False,tailleLot=256):
+    "Renvoie le nombre d'erreurs du modèle (PerceptronNoyau ou PerceptronApproche) sur les exemples de test data, prédits par lots sans mélanger exemples de test et vecteurs de support"
+    decisions = modele.decision(data,tailleLot)
+    err=0
+    for i in range(0,len(decisions)):
+        if signe(decisions[i]) != target[i]:
+            err+=1
+            if display:
+                print("Exemple {} : predit comme {} au lieu de {}.".format(data[i],signe(decisions[i]),target[i]))
+    return err
+
+#4) Approximation du noyau par un espace de caractéristiques explicite
+class PerceptronApproche(object):
+    "Perceptron linéaire appris sur une projection explicite des exemples étendus approchant un noyau : prédire coûte une projection et un produit scalaire, quel que soit le nombre d'exemples d'apprentissage"
+
+    def __init__(self,projection,w):
+        "projection : fonction associant à une matrice d'exemples étendus (voir etendre) la matrice de leurs caractéristiques ; w : poids du perceptron linéaire"
+        self.projection = projection
+        self.w = w
+
+    def decision(self,data,tailleLot=256):
+        "Renvoie la valeur de décision de chaque ligne de data (exemples non étendus), projetée par lots de tailleLot lignes"
+        data = np.atleast_2d(np.asarray(data))
+        pred = np.zeros(data.shape[0])
+        for debut in range(0,data.shape[0],tailleLot):
+            phi = self.projection(etendre(data[debut:debut+tailleLot]))
+            pred[debut:debut+phi.shape[0]] = np.dot(phi,self.w)
+        return pred
+
+    def predire(self,data,tailleLot=256):
+        "Renvoie la classe prédite (voir signe) de chaque ligne de data"
+        return np.array([signe(pred) for pred in self.decision(data,tailleLot)])
+
+def learnPerceptronLineaire(phi,target,epoques=10,arretSansErreur=True):
+    "Apprend par l'algorithme du perceptron les poids w tels que signe(phi[i].w) = target[i] ; renvoie w, le nombre d'époques effectuées et les erreurs de chacune"
+    target = np.asarray(target)
+    w = np.zeros(phi.shape[1])
+    erreurs = []
+    for c in range(0,epoques):
+        err = 0
+        for i in range(0,phi.shape[0]):
+            if signe(np.dot(phi[i],w)) != target[i]:
+                w += target[i]*phi[i]
+                err += 1
+        erreurs.append(err)
+        if arretSansErreur and err == 0:
+            break
+    return w, len(erreurs), erreurs
+
+def fourierAleatoire(d,D,sigma,graine=None):
+    "Tire les paramètres (W, b) de D caractéristiques de Fourier aléatoires pour des vecteurs de taille d, telles que le produit scalaire de deux projections (voir projectionFourier) approche noyauGaussien(x1,x2,sigma)"
+    hasard = np.random.RandomState(graine)
+    #exp(-||x1-x2||²/sigma²) est la transformée de Fourier d'une gaussienne d'écart type sqrt(2)/sigma
+    W = hasard.normal(0, math.sqrt(2)/sigma, (d,D))
+    b = hasard.uniform(0, 2*math.pi, D)
+    return W, b
+
+def projectionFourier(data,W,b):
+    "Projette chaque ligne de data sur les caractéristiques de Fourier aléatoires (W, b) : sqrt(2/D)*cos(x.W+b), calculé dans le type de W"
+    phi = np.dot(np.asarray(data,W.dtype),W)
+    phi += b
+    np.cos(phi,out=phi)
+    phi *= math.sqrt(2.0/W.shape[1])
+    return phi
+
+def learnFourierPerceptron(data,target,sigma,D,epoques=10,arretSansErreur=True,graine=None,dtype=np.float64):
+    """Apprend un perceptron approchant le perceptron à noyau gaussien de paramètre sigma : les exemples étendus sont projetés
+    sur D caractéristiques de Fourier aléatoires, sur lesquelles un perceptron linéaire est appris.
+    Apprentissage et prédiction sont linéaires en le nombre d'exemples ; plus D est grand, meilleure est l'approximation du noyau.
+    Renvoie un PerceptronApproche, avec le nombre d'époques effectuées et les erreurs de chacune."""
+    data = np.asarray(data)
+    W, b = fourierAleatoire(data.shape[1]+1,D,sigma,graine)
+    #conversion unique des paramètres, plutôt qu'à chaque lot projeté
+    projection = partial(projectionFourier,W=W.astype(dtype),b=b.astype(dtype))
+    w, epoques, erreurs = learnPerceptronLineaire(projection(etendre(data)),target,epoques,arretSansErreur)
+    modele = PerceptronApproche(projection,w)
+    modele.epoques = epoques
+    modele.erreurs = erreurs
+    return modele
+
+def reperesKMeans(data,m,iterations=10,graine=None):
+    "Renvoie les m centres obtenus par l'algorithme des k-moyennes (iterations itérations de Lloyd) sur les lignes de data, initialisés sur m lignes tirées au hasard"
+    data = np.asarray(data,dtype=float)
+    hasard = np.random.RandomState(graine)
+    centres = data[hasard.choice(data.shape[0],m,replace=False)].copy()
+    normes = np.einsum('ij,ij->i', data, data)
+    for c in range(0,iterations):
+        #distances au carré de chaque exemple à chaque centre, à une constante près par exemple
+        distances = np.einsum('ij,ij->i', centres, centres)[None,:] - 2*np.dot(data, centres.T)
+        groupes = np.argmin(distances + normes[:,None], axis=1)
+        for k in range(0,m):
+            membres = data[groupes == k]
+            #un centre sans exemple reste en place
+            if len(membres):
+                centres[k] = membres.mean(axis=0)
+    return centres
+
+def choisirReperes(data,m,choix='uniforme',graine=None):
+    "Choisit m points repères parmi les lignes de data : 'uniforme' tire m lignes distinctes au hasard, 'kmeans' prend les centres des k-moyennes"
+    data = np.asarray(data)
+    m = min(m, data.shape[0])
+    if choix == 'uniforme':
+        return data[np.random.RandomState(graine).choice(data.shape[0],m,replace=False)]
+    if choix == 'kmeans':
+        return reperesKMeans(data,m,graine=graine)
+    raise Exception("Choix de repères inconnu : {}".format(choix))
+
+def projectionNystrom(data,reperes,kernel,h,normalisation,dtype=np.float64):
+    "Projette chaque ligne de data sur l'espace de Nyström défini par les repères : kernel(x,repères).normalisation"
+    return np.dot(noyauMatrice(kernel,data,reperes,h,dtype),normalisation)
+
+def learnNystromPerceptron(data,target,kernel,h,m,choix='uniforme',epoques=10,arretSansErreur=True,graine=None,dtype=np.float64):
+    """Apprend un perceptron approchant le perceptron à noyau kernel de paramètre h par la méthode de Nyström : m repères sont choisis
+    parmi les exemples étendus (voir choisirReperes), et chaque exemple x est représenté par K(x,repères).K(repères,repères)^(-1/2),
+    dont les produits scalaires approchent le noyau. Un perceptron linéaire est appris sur ces m caractéristiques :
+    temps et mémoire en O(n*m) au lieu de O(n²).
+    Renvoie un PerceptronApproche, avec le nombre d'époques effectuées et les erreurs de chacune."""
+    dataExt = etendre(data)
+    reperes = choisirReperes(dataExt,m,choix,graine)
+    valeurs, vecteurs = np.linalg.eigh(noyauMatrice(kernel,reperes,reperes,h,np.float64))
+    #les valeurs propres quasi nulles (repères redondants) sont écartées
+    garde = valeurs > valeurs.max()*1e-10
+    normalisation = vecteurs[:,garde] / np.sqrt(valeurs[garde])
+    projection = partial(projectionNystrom,reperes=reperes,kernel=kernel,h=h,normalisation=normalisation,dtype=dtype)
+    w, epoques, erreurs = learnPerceptronLineaire(projection(dataExt),target,epoques,arretSansErreur)
+    modele = PerceptronApproche(projection,w)
+    modele.epoques = epoques
+    modele.erreurs = erreurs
+    return modele
+
+
 #-------------------------------------------
 if __name__ == '__main__':
     #3.3) Tester predictKernelPerceptron sur les données du TP3
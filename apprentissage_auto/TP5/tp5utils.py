@@ -9,6 +9,19 @@ Created on Thu March 2 2016
 import numpy as np
 from PIL import Image
 import os
+import io
+import sys
+import time
+import hashlib
+import shutil
+import tempfile
+import argparse
+import threading
+import queue
+import json
+import struct
+from functools import partial
+from multiprocessing import Pool, cpu_count
 from numpy import load
 
 # Affiche l'image contenu dans le fichier de nom filename,
@@ -17,11 +30,27 @@ def affImage(filename):
     im = Image.open(filename)
     im.show()
 
+# Retaille l'image im vers un canevas de cote npix, avec le filtre de
+# reechantillonnage filtre (ex. Image.NEAREST, Image.BILINEAR,
+# Image.LANCZOS), ou celui de PIL par defaut si filtre vaut None
+def retailler(im, npix, filtre=None):
+    if filtre is None:
+        return im.resize((npix,npix))
+    return im.resize((npix,npix), filtre)
+
 # Calcule le vecteur de pixels de l'image contenue dans le fichier
 # de nom filename, apres l'avoir retaillee vers un canevas de cote npix.
+# Si rapide est vrai, une image JPEG est directement decodee a l'echelle
+# reduite (1/2, 1/4 ou 1/8) la plus petite restant au moins de cote npix
+# (mode draft de PIL), avant le retaillage final : beaucoup moins couteux
+# sur les grandes photos, pour un resultat legerement different.
+# filtre : voir retailler
 # Retourne donc un vecteur de taille npix*npix*3 (RGB par pixel)
-def imageToVecteurPixels(filename, npix):
-    im = Image.open(filename).resize((npix,npix))
+def imageToVecteurPixels(filename, npix, rapide=False, filtre=None):
+    im = Image.open(filename)
+    if rapide:
+        im.draft('RGB', (npix,npix))
+    im = retailler(im, npix, filtre)
     return np.reshape(np.array(im), (1, npix*npix*3))
     
 # Calcule le vecteur correspondant a l'histogramme de couleurs de 
@@ -32,59 +61,952 @@ def imageToHistogrammeCouleurs(filename):
     width, height = im.size
     return np.array(im.histogram()) / (1.0 * width * height)
 
+# Cache disque des caracteristiques extraites des images.
+# Les vecteurs calcules pour les images d'un repertoire (ex. Data/Mer) sont
+# enregistres en .npy dans le repertoire NOM_CACHE voisin (ex. Data/.cache),
+# sous un nom derive du chemin de l'image, de sa date de modification, de
+# sa taille et des parametres d'extraction : une image modifiee n'est donc
+# jamais servie depuis un ancien vecteur.
+NOM_CACHE = '.cache'
+
+# Compteurs du cache pour le processus courant : lors d'un chargement avec
+# nbProcessus, les lectures ont lieu dans les processus du pool et ne sont
+# donc pas comptees ici
+compteursCache = {'trouves': 0, 'calcules': 0}
+
+# Renvoie le repertoire de cache associe au repertoire d'images rep
+def repertoireCache(rep):
+    return os.path.join(os.path.dirname(os.path.abspath(rep)), NOM_CACHE)
+
+# Renvoie le chemin du fichier .npy de cache pour l'image filename et
+# les parametres d'extraction donnes
+def fichierCache(filename, parametres):
+    st = os.stat(filename)
+    cle = '|'.join([os.path.abspath(filename), repr(st.st_mtime), str(st.st_size)]
+                   + [str(p) for p in parametres])
+    nom = hashlib.sha1(cle.encode('utf-8')).hexdigest() + '.npy'
+    return os.path.join(repertoireCache(os.path.dirname(filename)), nom)
+
+# Renvoie fonction(filename, *parametres), lu depuis le cache s'il existe,
+# calcule puis enregistre sinon. Les vecteurs sont petits et lus en entier :
+# une projection en memoire garderait un descripteur de fichier ouvert par
+# image tant que le vecteur est utilise.
+def caracteristiquesEnCache(fonction, filename, *parametres):
+    chemin = fichierCache(filename, (fonction.__name__,) + parametres)
+    if os.path.exists(chemin):
+        compteursCache['trouves'] += 1
+        return np.load(chemin)
+    compteursCache['calcules'] += 1
+    vec = fonction(filename, *parametres)
+    rep = os.path.dirname(chemin)
+    if not os.path.isdir(rep):
+        os.makedirs(rep, exist_ok=True)
+    # ecriture dans un fichier temporaire puis renommage, pour que des
+    # processus concurrents ne lisent jamais un fichier incomplet
+    fd, tmp = tempfile.mkstemp(suffix='.npy', dir=rep)
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, vec)
+    os.replace(tmp, chemin)
+    return vec
+
+# Versions avec cache de imageToVecteurPixels et imageToHistogrammeCouleurs
+def imageToVecteurPixelsCache(filename, npix, rapide=False, filtre=None):
+    return caracteristiquesEnCache(imageToVecteurPixels, filename, npix,
+                                   rapide, filtre)
+
+def imageToHistogrammeCouleursCache(filename):
+    return caracteristiquesEnCache(imageToHistogrammeCouleurs, filename)
+
+# Statistiques du cache : compteurs du processus courant (voir
+# compteursCache ; ils ignorent les chargements faits par un pool), et,
+# pour chaque repertoire d'images donne, nombre de fichiers et octets
+# occupes sur disque, qui refletent tous les processus
+def statistiquesCache(*reps):
+    stats = dict(compteursCache)
+    stats['fichiers'] = 0
+    stats['octets'] = 0
+    for rc in set(repertoireCache(rep) for rep in reps):
+        if os.path.isdir(rc):
+            for nf in os.listdir(rc):
+                stats['fichiers'] += 1
+                stats['octets'] += os.path.getsize(os.path.join(rc, nf))
+    return stats
+
+# Supprime le cache associe a chacun des repertoires d'images donnes
+def viderCache(*reps):
+    for rc in set(repertoireCache(rep) for rep in reps):
+        if os.path.isdir(rc):
+            shutil.rmtree(rc)
+    compteursCache['trouves'] = 0
+    compteursCache['calcules'] = 0
+
+# Decode une seule fois l'image contenue dans le fichier filename et
+# renvoie un dictionnaire associant a chaque cote npix de tailles le
+# vecteur de pixels correspondant (voir imageToVecteurPixels), et a la
+# cle 'histo', si histogramme est vrai, son histogramme de couleurs.
+# rapide, filtre : voir imageToVecteurPixels ; l'echelle de decodage est
+# choisie pour la plus grande des tailles (l'histogramme est alors celui
+# de l'image decodee a cette echelle).
+def imageToPyramide(filename, tailles, histogramme=True, rapide=False,
+                    filtre=None):
+    im = Image.open(filename)
+    if rapide and tailles:
+        npix = max(tailles)
+        im.draft('RGB', (npix,npix))
+    im.load()
+    res = {}
+    for npix in tailles:
+        res[npix] = np.reshape(np.array(retailler(im, npix, filtre)), (1, npix*npix*3))
+    if histogramme:
+        width, height = im.size
+        res['histo'] = np.array(im.histogram()) / (1.0 * width * height)
+    return res
+
+# Liste les couples (chemin, classe) des images du rep1 (classe t1) puis
+# du rep2 (classe t2), dans l'ordre renvoye par os.listdir. Les debut
+# premieres entrees de chaque repertoire sont ignorees.
+def fichiersDeuxClasses(rep1, rep2, t1, t2, debut=0):
+    fichiers = [(rep1+'/'+nf, t1) for nf in os.listdir(rep1)[debut:]]
+    fichiers += [(rep2+'/'+nf, t2) for nf in os.listdir(rep2)[debut:]]
+    return fichiers
+
+# Liste triee des noms des images du repertoire rep (les fichiers et
+# repertoires caches, comme le cache, sont ignores)
+def listerImages(rep):
+    return sorted(nf for nf in os.listdir(rep) if not nf.startswith('.')
+                  and os.path.isfile(os.path.join(rep, nf)))
+
+# Liste les couples (chemin, classe) des images (voir listerImages) du
+# rep1 (classe t1) et du rep2 (classe t2), tries par chemin
+def imagesDeuxClasses(rep1, rep2, t1, t2):
+    return sorted([(rep1+'/'+nf, t1) for nf in listerImages(rep1)] +
+                  [(rep2+'/'+nf, t2) for nf in listerImages(rep2)])
+
+# Choisit l'extraction des caracteristiques des images de fichiers (liste
+# de couples (chemin, classe)) : vecteurs de pixels de cote sizex, ou
+# histogrammes de couleurs si sizex est None (leur taille depend du nombre
+# de canaux de la premiere image, 768 si la liste est vide)
+# dtype : type des vecteurs (None = uint8 pour les pixels, float32 pour
+# les histogrammes)
+# Renvoie la fonction d'extraction, la taille d des vecteurs et le dtype.
+def extractionImages(fichiers, sizex=None, dtype=None):
+    if sizex is None:
+        extraction = imageToHistogrammeCouleurs
+        if fichiers:
+            # l'ouverture seule lit l'en-tete, sans decoder l'image
+            with Image.open(fichiers[0][0]) as im:
+                d = 256 * len(im.getbands())
+        else:
+            d = 768
+        defaut = np.float32
+    else:
+        extraction = partial(imageToVecteurPixels, npix=sizex)
+        d = sizex*sizex*3
+        defaut = np.uint8
+    return extraction, d, np.dtype(defaut if dtype is None else dtype)
+
+# Applique fonction a chacun des fichiers, et renvoie la liste des
+# resultats dans l'ordre des fichiers.
+# Si nbProcessus vaut None, les images sont traitees sequentiellement ;
+# sinon elles sont decodees en parallele par un pool de nbProcessus
+# processus (0 = autant de processus que de coeurs).
+# fonction doit pouvoir etre transmise aux processus (fonction du module
+# ou functools.partial d'une telle fonction).
+# Si matrice est fournie (tableau prealloue d'une ligne par fichier), le
+# resultat de chaque fichier est aplati dans sa ligne des qu'il est
+# disponible, sans liste intermediaire, et c'est matrice qui est renvoyee.
+def extraireFichiers(fonction, fichiers, nbProcessus=None, matrice=None):
+    if nbProcessus is None:
+        return collecterResultats((fonction(f) for f in fichiers), matrice)
+    nbProcessus = nbProcessus or cpu_count()
+    # des paquets de quelques images limitent le cout des echanges
+    # entre processus sans desequilibrer la charge
+    paquet = max(1, len(fichiers) // (4 * nbProcessus))
+    pool = Pool(nbProcessus)
+    try:
+        return collecterResultats(pool.imap(fonction, fichiers, paquet), matrice)
+    finally:
+        pool.close()
+        pool.join()
+
+# Range les resultats dans une liste, ou ligne par ligne dans matrice.
+# matrice peut aussi etre un dictionnaire de matrices, chaque resultat
+# etant alors un dictionnaire de vecteurs ayant les memes cles.
+def collecterResultats(resultats, matrice=None):
+    if matrice is None:
+        return list(resultats)
+    for i, vec in enumerate(resultats):
+        if isinstance(matrice, dict):
+            for cle, m in matrice.items():
+                m[i] = np.ravel(vec[cle])
+        else:
+            matrice[i] = np.ravel(vec)
+    return matrice
+
 # Charge et renvoie les donnees images, sous format vecteurs de pixels
 # RGB, contenues dans le rep1 pour la classe t1, et dans le rep2 pour
 # la classe t2.
 # Les images sont retaillees, toutes a la meme dimension de taille
 # sizex*sizex
+# nbProcessus : voir extraireFichiers (None = chargement sequentiel)
+# cache : si vrai, les vecteurs sont lus depuis / ecrits dans le cache disque
+# dtype : si None, data et target sont des listes ; sinon data est une
+# matrice (n, sizex*sizex*3) de ce type (ex. np.uint8, np.float32),
+# remplie sur place, et target un vecteur numpy
+# rapide, filtre : voir imageToVecteurPixels
 # data = liste de vecteurs de pixels (un vecteur par image)
 # target = liste de classes (une classe par exemple)
 # n = nb total d'exemples
 # taille des vecteurs (nb de composantes)
-def chargementVecteursImages(rep1, rep2, t1, t2, sizex):
-    data = []
-    target = []
-    i=0
-    # parcours de tous les fichiers image du rep1 (classe t1)
-    for nf in os.listdir(rep1)[1:]:
-	# conversion image -> vec de pixels rgb
-        data.append(imageToVecteurPixels(rep1+'/'+nf, sizex))
-        target.append(t1)
-        i=i+1
-        j=0
-        # parcours de tous les fichiers image du rep2 (classe t2)
-    for nf in os.listdir(rep2)[1:]:
-        data.append(imageToVecteurPixels(rep2+'/'+nf, sizex))
-        target.append(t2)
-        j=j+1
-        n = i+j # nb d'exemples de l'echantillon
-    return n, data, target, sizex*sizex*3
+def chargementVecteursImages(rep1, rep2, t1, t2, sizex, nbProcessus=None,
+                             cache=False, dtype=None, rapide=False, filtre=None):
+    # la premiere entree de chaque repertoire est ignoree
+    fichiers = fichiersDeuxClasses(rep1, rep2, t1, t2, 1)
+    n = len(fichiers) # nb d'exemples de l'echantillon
+    d = sizex*sizex*3
+    # conversion image -> vec de pixels rgb
+    extraction = imageToVecteurPixelsCache if cache else imageToVecteurPixels
+    matrice = None if dtype is None else np.empty((n, d), dtype)
+    data = extraireFichiers(partial(extraction, npix=sizex, rapide=rapide,
+                                    filtre=filtre),
+                            [nf for nf, _ in fichiers], nbProcessus, matrice)
+    target = [t for _, t in fichiers]
+    if dtype is not None:
+        target = np.array(target)
+    return n, data, target, d
 
 # Charge et renvoie les donnees images, sous format d'histogrammes
 # de couleurs RGB, contenues dans le rep1 pour la classe t1, et dans 
 # le rep2 pour la classe t2.
 # Les vecteurs sont donc tous de la meme taille, sans que l'on ait a 
 # retailler les images.
+# nbProcessus : voir extraireFichiers (None = chargement sequentiel)
+# cache : si vrai, les vecteurs sont lus depuis / ecrits dans le cache disque
+# dtype : si None, data et target sont des listes ; sinon data est une
+# matrice (n, 768) de ce type (ex. np.float32), remplie sur place, et
+# target un vecteur numpy
 # data = liste de vecteurs de pixels (un vecteur par image)
 # target = liste de classes (une classe par exemple)
 # n = nb total d'exemples
 # taille des vecteurs (nb de composantes)
-def chargementHistogrammesImages(rep1, rep2, t1, t2):
-    data = []
-    target = []
-    i=0
-    for nf in os.listdir(rep1)[0:]:
-        data.append(imageToHistogrammeCouleurs(rep1+'/'+nf))
-        target.append(t1)
-        i+=1
-        j=0
-    for nf in os.listdir(rep2)[0:]:
-        data.append(imageToHistogrammeCouleurs(rep2+'/'+nf))
-        target.append(t2)
-        j=j+1
-        n=j+i
+def chargementHistogrammesImages(rep1, rep2, t1, t2, nbProcessus=None,
+                                 cache=False, dtype=None):
+    fichiers = fichiersDeuxClasses(rep1, rep2, t1, t2, 0)
+    n = len(fichiers)
+    extraction = imageToHistogrammeCouleursCache if cache else imageToHistogrammeCouleurs
+    matrice = None
+    if dtype is not None:
+        # 256 valeurs par canal (voir extractionImages)
+        _, d, _ = extractionImages(fichiers)
+        matrice = np.empty((n, d), dtype)
+    data = extraireFichiers(extraction,
+                            [nf for nf, _ in fichiers], nbProcessus, matrice)
+    target = [t for _, t in fichiers]
+    if dtype is not None:
+        target = np.array(target)
     return n, data, target, data[0].shape[0]
 
+# Charge les images du rep1 (classe t1) et du rep2 (classe t2) en ne
+# decodant chaque image qu'une fois, pour toutes les tailles de tailles.
+# debut : nb d'entrees ignorees en tete de chaque repertoire (1 reproduit
+# la liste de chargementVecteursImages, 0 celle de
+# chargementHistogrammesImages)
+# nbProcessus : voir extraireFichiers (None = chargement sequentiel)
+# rapide, filtre : voir imageToPyramide
+# n = nb total d'exemples
+# data = dictionnaire cote npix -> matrice (n, npix*npix*3) de type dtype,
+# plus la cle 'histo' -> matrice (n, 768) si histogramme est vrai
+# target = vecteur des classes
+def chargementPyramideImages(rep1, rep2, t1, t2, tailles, histogramme=True,
+                             debut=0, nbProcessus=None, dtype=np.uint8,
+                             rapide=False, filtre=None):
+    fichiers = fichiersDeuxClasses(rep1, rep2, t1, t2, debut)
+    n = len(fichiers)
+    data = dict((npix, np.empty((n, npix*npix*3), dtype)) for npix in tailles)
+    if histogramme:
+        _, d, _ = extractionImages(fichiers)
+        data['histo'] = np.empty((n, d))
+    extraction = partial(imageToPyramide, tailles=list(tailles),
+                         histogramme=histogramme, rapide=rapide, filtre=filtre)
+    extraireFichiers(extraction, [nf for nf, _ in fichiers], nbProcessus, data)
+    target = np.array([t for _, t in fichiers])
+    return n, data, target
+
+# Parcourt les images du rep1 (classe t1) et du rep2 (classe t2) par lots
+# de tailleLot images, et produit pour chaque lot le couple (X_lot, y_lot) :
+# X_lot matrice (tailleLot, d) de type dtype (le dernier lot peut etre plus
+# petit), y_lot vecteur des classes. Un seul lot est en memoire a la fois,
+# ce qui permet d'apprendre par partial_fit sur plus d'images que la RAM
+# n'en contient.
+# sizex : cote des vecteurs de pixels, ou None pour des histogrammes de
+# couleurs
+# melanger : si vrai, les fichiers (voir imagesDeuxClasses) sont
+# parcourus selon une permutation tiree avec la graine donnee, donc
+# reproductible
+def lotsImages(rep1, rep2, t1, t2, tailleLot, sizex=None, melanger=False,
+               graine=None, dtype=np.float32):
+    fichiers = imagesDeuxClasses(rep1, rep2, t1, t2)
+    if melanger:
+        ordre = np.random.RandomState(graine).permutation(len(fichiers))
+        fichiers = [fichiers[i] for i in ordre]
+    extraction, d, dtype = extractionImages(fichiers, sizex, dtype)
+    for debut in range(0, len(fichiers), tailleLot):
+        lot = fichiers[debut:debut+tailleLot]
+        X_lot = extraireFichiers(extraction, [nf for nf, _ in lot], None,
+                                 np.empty((len(lot), d), dtype))
+        yield X_lot, np.array([t for _, t in lot])
+
+# Format "pack" : toutes les caracteristiques d'un jeu d'images dans un
+# seul fichier projetable en memoire.
+#   - MAGIE_PACK (8 octets)
+#   - longueur L de l'en-tete (entier non signe 64 bits, little endian)
+#   - en-tete JSON (L octets) : n, d, dtype, sizex, offset, fichiers
+#     (manifeste, dans l'ordre des lignes) et target
+#   - bourrage jusqu'a offset (multiple de ALIGNEMENT_PACK)
+#   - bloc contigu n*d des caracteristiques, ligne par ligne
+MAGIE_PACK = b'TP5PACK1'
+ALIGNEMENT_PACK = 64
+
+# Extrait les caracteristiques des images du rep1 (classe t1) et du rep2
+# (classe t2) et les ecrit dans le fichier pack de nom fichier. Les lignes
+# sont ecrites directement dans le fichier projete en memoire : le jeu
+# complet n'a jamais a tenir en RAM.
+# sizex : cote des vecteurs de pixels, ou None pour des histogrammes de
+# couleurs
+# dtype : type du bloc (voir extractionImages)
+# debut, nbProcessus : voir chargementPyramideImages
+def packerImages(fichier, rep1, rep2, t1, t2, sizex=None, dtype=None,
+                 debut=0, nbProcessus=None):
+    fichiers = fichiersDeuxClasses(rep1, rep2, t1, t2, debut)
+    n = len(fichiers)
+    extraction, d, dtype = extractionImages(fichiers, sizex, dtype)
+    entete = {'n': n, 'd': d, 'dtype': dtype.str, 'sizex': sizex,
+              'fichiers': [nf for nf, _ in fichiers],
+              'target': np.array([t for _, t in fichiers]).tolist()}
+    # l'offset depend de la longueur de l'en-tete, qui contient l'offset :
+    # on le fixe a une valeur assez grande pour les deux
+    brut = json.dumps(dict(entete, offset=0)).encode('utf-8')
+    offset = len(MAGIE_PACK) + 8 + len(brut) + 32
+    offset += -offset % ALIGNEMENT_PACK
+    entete['offset'] = offset
+    brut = json.dumps(entete).encode('utf-8')
+    with open(fichier, 'wb') as f:
+        f.write(MAGIE_PACK)
+        f.write(struct.pack('<Q', len(brut)))
+        f.write(brut)
+        f.truncate(offset + n*d*dtype.itemsize)
+    if n:
+        data = np.memmap(fichier, dtype, 'r+', offset, (n, d))
+        extraireFichiers(extraction, entete['fichiers'], nbProcessus, data)
+        data.flush()
+        del data
+    return n
+
+# Lit l'en-tete (dictionnaire) du fichier pack de nom fichier
+def entetePack(fichier):
+    with open(fichier, 'rb') as f:
+        if f.read(len(MAGIE_PACK)) != MAGIE_PACK:
+            raise Exception("{} n'est pas un fichier pack".format(fichier))
+        longueur, = struct.unpack('<Q', f.read(8))
+        return json.loads(f.read(longueur).decode('utf-8'))
+
+# Ouvre le fichier pack de nom fichier, en temps constant quel que soit le
+# nombre d'images : seul l'en-tete est lu, les caracteristiques sont
+# projetees en memoire (en lecture seule, donc partageables sans copie
+# entre processus qui ouvrent le meme fichier).
+# n = nb total d'exemples
+# data = matrice (n, d) projetee en memoire
+# target = vecteur des classes
+# taille des vecteurs (nb de composantes)
+def chargementPack(fichier):
+    entete = entetePack(fichier)
+    n, d = entete['n'], entete['d']
+    data = np.memmap(fichier, np.dtype(entete['dtype']), 'r',
+                     entete['offset'], (n, d)) if n else np.empty((0, d))
+    return n, data, np.array(entete['target']), d
+
+# Renvoie l'empreinte (date de modification et taille) du fichier filename
+def empreinteFichier(filename):
+    st = os.stat(filename)
+    return '{!r}|{}'.format(st.st_mtime, st.st_size)
+
+# Met a jour l'index incremental de nom fichierIndex (archive .npz) pour
+# les images du rep1 (classe t1) et du rep2 (classe t2), et renvoie son
+# contenu. L'index conserve, pour chaque image, son empreinte et son
+# vecteur : seules les images nouvelles ou modifiees depuis la derniere
+# mise a jour sont extraites, et les lignes des images supprimees sont
+# retirees. Un index construit avec d'autres parametres est reconstruit.
+# sizex : cote des vecteurs de pixels, ou None pour des histogrammes de
+# couleurs
+# dtype : type des vecteurs (voir extractionImages)
+# nbProcessus : voir extraireFichiers (None = chargement sequentiel)
+# n = nb total d'exemples
+# data = matrice (n, d), lignes dans l'ordre de imagesDeuxClasses
+# target = vecteur des classes
+# taille des vecteurs (nb de composantes)
+# stats = nb d'images conservees, ajoutees, modifiees et supprimees
+def mettreAJourIndex(fichierIndex, rep1, rep2, t1, t2, sizex=None,
+                     dtype=None, nbProcessus=None):
+    fichiers = imagesDeuxClasses(rep1, rep2, t1, t2)
+    n = len(fichiers)
+    extraction, d, dtype = extractionImages(fichiers, sizex, dtype)
+    empreintes = [empreinteFichier(nf) for nf, _ in fichiers]
+    target = np.array([t for _, t in fichiers])
+    data = np.empty((n, d), dtype)
+
+    # lignes de l'ancien index, par chemin d'image
+    anciens = {}
+    if os.path.exists(fichierIndex):
+        with np.load(fichierIndex) as index:
+            # chaque acces a une cle relit le tableau dans l'archive : la
+            # matrice n'est lue qu'une fois
+            ancienneData = index['data']
+            if (int(index['sizex']) == (sizex or 0) and ancienneData.dtype == dtype
+                    and ancienneData.shape[1] == d):
+                anciens = dict((nf, (em, t, vec)) for nf, em, t, vec in
+                               zip(index['fichiers'], index['empreintes'],
+                                   index['target'], ancienneData))
+
+    stats = {'conserves': 0, 'ajoutes': 0, 'modifies': 0, 'supprimes': 0}
+    aExtraire = []
+    for i, (nf, t) in enumerate(fichiers):
+        ancien = anciens.pop(nf, None)
+        if ancien is not None and ancien[0] == empreintes[i] and ancien[1] == t:
+            data[i] = ancien[2]
+            stats['conserves'] += 1
+        else:
+            aExtraire.append(i)
+            stats['modifies' if ancien is not None else 'ajoutes'] += 1
+    stats['supprimes'] = len(anciens)
+
+    if aExtraire:
+        nouveaux = extraireFichiers(extraction, [fichiers[i][0] for i in aExtraire],
+                                    nbProcessus, np.empty((len(aExtraire), d), dtype))
+        data[aExtraire] = nouveaux
+
+    # ecriture dans un fichier temporaire puis renommage, pour ne jamais
+    # laisser un index incomplet
+    rep = os.path.dirname(os.path.abspath(fichierIndex))
+    fd, tmp = tempfile.mkstemp(suffix='.npz', dir=rep)
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(f, fichiers=np.array([nf for nf, _ in fichiers], dtype=str),
+                 empreintes=np.array(empreintes, dtype=str), target=target,
+                 data=data, sizex=np.array(sizex or 0))
+    os.replace(tmp, fichierIndex)
+    return n, data, target, d, stats
+
+# Calcule l'histogramme de couleurs de l'image PIL im a 3 canaux (RGB, HSV...)
+# nbBins : nb de classes par canal (diviseur de 256) ; chaque valeur v
+# tombe dans la classe v * nbBins // 256
+# joint : si faux, histogrammes des trois canaux concatenes, soit 3*nbBins
+# valeurs, identiques a imageToHistogrammeCouleurs pour nbBins = 256 ; si
+# vrai, histogramme joint des couleurs quantifiees, soit nbBins**3 valeurs
+# Renvoie un vecteur normalise par le nombre de pixels de l'image.
+def histogrammeCouleurs(im, nbBins=256, joint=False):
+    if 256 % nbBins:
+        raise Exception("Le nombre de classes par canal doit diviser 256.")
+    width, height = im.size
+    if joint:
+        # un seul np.bincount sur l'indice (c1*nbBins + c2)*nbBins + c3 des
+        # couleurs quantifiees, calcule dans le plus petit type entier
+        # suffisant
+        q = np.asarray(im) // (256 // nbBins)
+        indices = q[..., 0].astype(np.uint16 if nbBins**3 <= 1 << 16 else np.uint32)
+        indices *= nbBins
+        indices += q[..., 1]
+        indices *= nbBins
+        indices += q[..., 2]
+        histo = np.bincount(np.ravel(indices), minlength=nbBins**3)
+    else:
+        # l'histogramme de PIL, calcule en C, est plusieurs fois plus rapide
+        # qu'un np.bincount ; les classes sont des regroupements contigus
+        # de ses 256 valeurs par canal
+        histo = np.reshape(im.histogram(), (3, nbBins, 256 // nbBins)).sum(axis=2)
+    return np.ravel(histo) / (1.0 * width * height)
+
+# Histogrammes de couleurs (voir histogrammeCouleurs) d'une liste d'images
+# deja decodees (images PIL ou tableaux numpy (hauteur, largeur, 3) de
+# uint8, de tailles quelconques), une ligne par image
+def histogrammesCouleursLot(images, nbBins=256, joint=False):
+    d = nbBins**3 if joint else 3*nbBins
+    histos = np.empty((len(images), d))
+    for i, im in enumerate(images):
+        if not isinstance(im, Image.Image):
+            im = Image.fromarray(np.asarray(im))
+        histos[i] = histogrammeCouleurs(im, nbBins, joint)
+    return histos
+
+# Decode l'image contenue dans le fichier filename et renvoie son
+# histogramme de couleurs RGB (voir histogrammeCouleurs)
+def imageToHistogrammeQuantifie(filename, nbBins=256, joint=False):
+    im = Image.open(filename)
+    if im.mode != 'RGB':
+        im = im.convert('RGB')
+    return histogrammeCouleurs(im, nbBins, joint)
+
+# Charge et renvoie les histogrammes de couleurs des images du rep1 (classe
+# t1) et du rep2 (classe t2), calcules par imageToHistogrammeQuantifie.
+# nbBins, joint : voir histogrammeCouleurs
+# nbProcessus : voir extraireFichiers ; decodage et histogramme ont lieu
+# dans les processus, qui ne renvoient que les histogrammes
+# n = nb total d'exemples
+# data = matrice des histogrammes (une ligne par image)
+# target = vecteur des classes
+# taille des vecteurs (nb de composantes)
+def chargementHistogrammesLot(rep1, rep2, t1, t2, nbBins=256, joint=False,
+                              nbProcessus=None):
+    fichiers = fichiersDeuxClasses(rep1, rep2, t1, t2, 0)
+    n = len(fichiers)
+    d = nbBins**3 if joint else 3*nbBins
+    extraction = partial(imageToHistogrammeQuantifie, nbBins=nbBins, joint=joint)
+    data = extraireFichiers(extraction, [nf for nf, _ in fichiers], nbProcessus,
+                            np.empty((n, d)))
+    target = np.array([t for _, t in fichiers])
+    return n, data, target, d
+
+# Extrait les vecteurs d'une tranche de fichiers dans une matrice
+# (len(tranche), d) de type dtype
+def extraireTranche(tranche, extraction, d, dtype):
+    return extraireFichiers(extraction, tranche, None,
+                            np.empty((len(tranche), d), dtype))
+
+# Charge et renvoie les images d'un nombre quelconque de classes.
+# classes : dictionnaire classe -> repertoire d'images, ou chemin d'un
+# repertoire dont chaque sous-repertoire (non cache) contient les images
+# d'une classe, nommee comme lui
+# sizex : cote des vecteurs de pixels, ou None pour des histogrammes de
+# couleurs
+# dtype : type des vecteurs (voir extractionImages)
+# nbProcessus : si None, chargement sequentiel ; sinon la liste des
+# fichiers est decoupee en nbProcessus tranches contigues (0 = nb de
+# coeurs), extraites chacune par un processus, puis recollees dans
+# l'ordre : le resultat ne depend pas du nombre de processus
+# Les classes sont parcourues dans l'ordre trie, et les images de chaque
+# classe dans l'ordre de listerImages.
+# n = nb total d'exemples
+# data = matrice (n, d)
+# target = vecteur des classes
+# taille des vecteurs (nb de composantes)
+def chargementClassesImages(classes, sizex=None, nbProcessus=None, dtype=None):
+    if not isinstance(classes, dict):
+        racine = classes
+        classes = dict((nom, os.path.join(racine, nom)) for nom in os.listdir(racine)
+                       if not nom.startswith('.') and os.path.isdir(os.path.join(racine, nom)))
+    fichiers = [(os.path.join(classes[t], nf), t) for t in sorted(classes)
+                for nf in listerImages(classes[t])]
+    n = len(fichiers)
+    extraction, d, dtype = extractionImages(fichiers, sizex, dtype)
+    chemins = [nf for nf, _ in fichiers]
+    target = np.array([t for _, t in fichiers])
+    if nbProcessus is None:
+        return n, extraireTranche(chemins, extraction, d, dtype), target, d
+    nbProcessus = nbProcessus or cpu_count()
+    bornes = np.linspace(0, n, nbProcessus + 1).astype(int)
+    tranches = [chemins[a:b] for a, b in zip(bornes[:-1], bornes[1:]) if b > a]
+    pool = Pool(nbProcessus)
+    try:
+        morceaux = pool.map(partial(extraireTranche, extraction=extraction,
+                                    d=d, dtype=dtype), tranches, 1)
+    finally:
+        pool.close()
+        pool.join()
+    data = np.concatenate(morceaux) if morceaux else np.empty((0, d), dtype)
+    return n, data, target, d
+
+# Etapes mesurees par imageMesuree, dans l'ordre ou elles ont lieu
+ETAPES = ('lecture', 'ouverture', 'decodage', 'retaillage', 'histogramme',
+          'conversion')
+
+# Calcule le vecteur de l'image contenue dans le fichier filename comme
+# imageToVecteurPixels (si npix est donne) ou imageToHistogrammeCouleurs
+# (sinon), en mesurant la duree de chaque etape : lecture du fichier,
+# ouverture (analyse de l'en-tete), decodage JPEG, retaillage ou calcul de
+# l'histogramme, conversion en vecteur numpy.
+# Renvoie le vecteur et un dictionnaire etape -> duree en secondes, avec
+# en plus 'octets', le nombre d'octets lus.
+def imageMesuree(filename, npix=None):
+    mesures = {}
+    t = time.perf_counter()
+    with open(filename, 'rb') as f:
+        octets = f.read()
+    mesures['octets'] = len(octets)
+    mesures['lecture'] = time.perf_counter() - t
+    t = time.perf_counter()
+    im = Image.open(io.BytesIO(octets))
+    mesures['ouverture'] = time.perf_counter() - t
+    t = time.perf_counter()
+    im.load()
+    mesures['decodage'] = time.perf_counter() - t
+    t = time.perf_counter()
+    if npix is not None:
+        im = im.resize((npix,npix))
+        mesures['retaillage'] = time.perf_counter() - t
+        t = time.perf_counter()
+        vec = np.reshape(np.array(im), (1, npix*npix*3))
+    else:
+        histo = im.histogram()
+        mesures['histogramme'] = time.perf_counter() - t
+        t = time.perf_counter()
+        width, height = im.size
+        vec = np.array(histo) / (1.0 * width * height)
+    mesures['conversion'] = time.perf_counter() - t
+    return vec, mesures
+
+# Agrege les mesures (liste de dictionnaires renvoyes par imageMesuree) :
+# pour chaque etape presente, duree totale et percentiles 50, 90 et 99 et
+# maximum par image (en secondes) ; plus le nb d'images et d'octets lus.
+def rapportMesures(mesures):
+    rapport = {'images': len(mesures),
+               'octets': sum(m['octets'] for m in mesures)}
+    for etape in ETAPES:
+        durees = np.array([m[etape] for m in mesures if etape in m])
+        if len(durees):
+            p50, p90, p99 = np.percentile(durees, [50, 90, 99])
+            rapport[etape] = {'total': durees.sum(), 'p50': p50, 'p90': p90,
+                              'p99': p99, 'max': durees.max()}
+    return rapport
+
+# Affiche le rapport renvoye par rapportMesures, durees en ms
+def afficherRapport(rapport):
+    total = sum(rapport[e]['total'] for e in ETAPES if e in rapport)
+    print("{} images, {:.1f} Ko lus".format(rapport['images'], rapport['octets'] / 1024.0))
+    print("| etape       |   total ms |     % |  p50 ms |  p90 ms |  p99 ms |  max ms |")
+    for e in ETAPES:
+        if e in rapport:
+            r = rapport[e]
+            print("| {:11s} | {:10.3f} | {:5.1f} | {:7.3f} | {:7.3f} | {:7.3f} | {:7.3f} |".format(
+                e, r['total']*1000, 100.0*r['total']/total if total else 0,
+                r['p50']*1000, r['p90']*1000, r['p99']*1000, r['max']*1000))
+
+# Charge les images du rep1 (classe t1) et du rep2 (classe t2) comme
+# chargementVecteursImages (si sizex est donne, debut=1) ou
+# chargementHistogrammesImages (sinon, debut=0), en mesurant chaque etape
+# de l'extraction de chaque image (voir imageMesuree).
+# nbProcessus : voir extraireFichiers (les durees sont alors mesurees dans
+# chaque processus)
+# afficher : si vrai, le rapport est affiche a la fin du chargement
+# Renvoie n, data, target, taille des vecteurs (comme les chargements
+# ci-dessus) et le rapport de rapportMesures.
+def profilerChargement(rep1, rep2, t1, t2, sizex=None, nbProcessus=None,
+                       afficher=True):
+    debut = 0 if sizex is None else 1
+    fichiers = fichiersDeuxClasses(rep1, rep2, t1, t2, debut)
+    t = time.perf_counter()
+    resultats = extraireFichiers(partial(imageMesuree, npix=sizex),
+                                 [nf for nf, _ in fichiers], nbProcessus)
+    duree = time.perf_counter() - t
+    data = [vec for vec, _ in resultats]
+    rapport = rapportMesures([m for _, m in resultats])
+    rapport['duree'] = duree
+    if afficher:
+        afficherRapport(rapport)
+        print("duree totale du chargement : {:.3f} ms".format(duree*1000))
+    return len(fichiers), data, [t for _, t in fichiers], data[0].shape[-1], rapport
+
+# Charge les images du rep1 (classe t1) et du rep2 (classe t2) comme
+# chargementVecteursImages (si sizex est donne) ou
+# chargementHistogrammesImages (sinon), et renvoie le meme resultat, mais
+# en recouvrant la lecture des fichiers et leur decodage : nbLecteurs
+# threads lisent les fichiers et deposent leur contenu brut dans une file
+# bornee a profondeur elements, que nbDecodeurs threads (0 ou None = nb de
+# coeurs) vident en decodant les images (PIL libere le GIL pendant le
+# decodage et le retaillage). Utile sur un cache disque froid ou un
+# repertoire reseau.
+# dtype : voir chargementVecteursImages
+def chargementPrefetch(rep1, rep2, t1, t2, sizex=None, nbLecteurs=2,
+                       nbDecodeurs=None, profondeur=16, dtype=None):
+    debut = 0 if sizex is None else 1
+    fichiers = fichiersDeuxClasses(rep1, rep2, t1, t2, debut)
+    n = len(fichiers)
+    extraction, d, _ = extractionImages(fichiers, sizex, dtype)
+    data = [None] * n if dtype is None else np.empty((n, d), dtype)
+
+    aLire = queue.Queue()
+    for i, (nf, _) in enumerate(fichiers):
+        aLire.put((i, nf))
+    lus = queue.Queue(profondeur)
+    erreurs = []
+
+    def lecteur():
+        while True:
+            try:
+                i, nf = aLire.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                with open(nf, 'rb') as f:
+                    lus.put((i, f.read()))
+            except Exception as e:
+                erreurs.append(e)
+
+    def decodeur():
+        while True:
+            element = lus.get()
+            if element is None:
+                return
+            i, octets = element
+            try:
+                vec = extraction(io.BytesIO(octets))
+                if dtype is None:
+                    data[i] = vec
+                else:
+                    data[i] = np.ravel(vec)
+            except Exception as e:
+                erreurs.append(e)
+
+    lecteurs = [threading.Thread(target=lecteur) for _ in range(nbLecteurs)]
+    decodeurs = [threading.Thread(target=decodeur) for _ in range(nbDecodeurs or cpu_count())]
+    for th in lecteurs + decodeurs:
+        th.daemon = True
+        th.start()
+    for th in lecteurs:
+        th.join()
+    # une marque de fin par decodeur, une fois tous les fichiers lus
+    for _ in decodeurs:
+        lus.put(None)
+    for th in decodeurs:
+        th.join()
+    if erreurs:
+        raise erreurs[0]
+
+    target = [t for _, t in fichiers]
+    if dtype is not None:
+        target = np.array(target)
+    return n, data, target, data[0].shape[-1]
+
+# Matrice de vecteurs de pixels stockee en uint8 (8 fois moins de memoire
+# qu'en float64), dont les lignes ne sont converties en float32 qu'au
+# moment ou elles sont lues, eventuellement centrees et reduites par
+# composante.
+class PixelsCompacts(object):
+
+    # data : matrice (n, d) de pixels (ex. renvoyee par
+    # chargementVecteursImages avec dtype=np.uint8, ou par chargementPack) ;
+    # une matrice d'entiers d'un autre type est acceptee si toutes ses
+    # valeurs sont dans [0, 255], tout autre contenu est refuse
+    # echelle : si vrai, calcule tout de suite la moyenne et l'ecart type
+    # de chaque composante (voir calculerEchelle)
+    def __init__(self, data, echelle=False):
+        if getattr(data, 'dtype', None) != np.uint8:
+            data = np.asarray(data)
+            if not np.issubdtype(data.dtype, np.integer):
+                raise Exception("PixelsCompacts attend des pixels entiers, pas des valeurs de type {}.".format(data.dtype))
+            if data.size and (data.min() < 0 or data.max() > 255):
+                raise Exception("PixelsCompacts attend des pixels dans [0, 255].")
+            data = data.astype(np.uint8)
+        self.data = data
+        self.moyenne = None
+        self.ecart = None
+        if echelle:
+            self.calculerEchelle()
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    # Calcule, une fois pour toutes et par lots de tailleLot lignes, la
+    # moyenne et l'ecart type de chaque composante ; les lectures suivantes
+    # renvoient alors des vecteurs centres reduits
+    def calculerEchelle(self, tailleLot=256):
+        somme = np.zeros(self.data.shape[1])
+        carres = np.zeros(self.data.shape[1])
+        for debut in range(0, len(self), tailleLot):
+            lot = self.data[debut:debut+tailleLot].astype(np.float64)
+            somme += lot.sum(axis=0)
+            carres += (lot*lot).sum(axis=0)
+        n = max(len(self), 1)
+        moyenne = somme / n
+        ecart = np.sqrt(np.maximum(carres / n - moyenne*moyenne, 0))
+        ecart[ecart == 0] = 1
+        self.moyenne = moyenne.astype(np.float32)
+        self.ecart = ecart.astype(np.float32)
+
+    # Lignes d'indices idx (entier, tranche ou liste), en float32
+    def __getitem__(self, idx):
+        x = self.data[idx].astype(np.float32)
+        if self.moyenne is not None:
+            x -= self.moyenne
+            x /= self.ecart
+        return x
+
+    # Parcourt les lignes (d'indices indices si donne, dans cet ordre) par
+    # lots de tailleLot, convertis en float32
+    def lots(self, tailleLot=256, indices=None):
+        n = len(self) if indices is None else len(indices)
+        for debut in range(0, n, tailleLot):
+            if indices is None:
+                yield self[debut:debut+tailleLot]
+            else:
+                yield self[indices[debut:debut+tailleLot]]
+
+# Extracteurs de caracteristiques utilisables par imageToCaracteristiques :
+# nom -> fonction(im, **parametres) renvoyant un vecteur numpy a une
+# dimension, im etant une image PIL RGB deja decodee.
+# Avec un pool de processus, les extracteurs doivent etre enregistres a
+# l'import d'un module pour exister aussi dans les processus.
+EXTRACTEURS = {}
+
+def enregistrerExtracteur(nom, fonction):
+    EXTRACTEURS[nom] = fonction
+
+# Vecteur de pixels de l'image retaillee en npix*npix (voir retailler)
+def extracteurPixels(im, npix=50, filtre=None):
+    return np.ravel(np.array(retailler(im, npix, filtre)))
+
+# Histogramme RGB (voir histogrammeCouleurs)
+def extracteurHistoRGB(im, nbBins=256, joint=False):
+    return histogrammeCouleurs(im, nbBins, joint)
+
+# Histogramme des composantes teinte, saturation, valeur
+def extracteurHistoHSV(im, nbBins=16):
+    return histogrammeCouleurs(im.convert('HSV'), nbBins)
+
+# Histogrammes RGB des grille*grille cases de l'image, concatenes ligne
+# par ligne : garde une trace de la repartition spatiale des couleurs
+def extracteurGrille(im, grille=2, nbBins=8):
+    width, height = im.size
+    lignes = np.linspace(0, height, grille + 1).astype(int)
+    colonnes = np.linspace(0, width, grille + 1).astype(int)
+    cases = [im.crop((colonnes[j], lignes[i], colonnes[j+1], lignes[i+1]))
+             for i in range(grille) for j in range(grille)]
+    return np.ravel(histogrammesCouleursLot(cases, nbBins))
+
+# Statistiques des gradients de l'image en niveaux de gris : moyenne et
+# ecart type des gradients horizontaux, verticaux et de leur norme, puis
+# histogramme des orientations (nbBins classes sur [-pi, pi]) pondere par
+# la norme et normalise
+def extracteurGradients(im, nbBins=8):
+    gris = np.asarray(im.convert('L'), np.float32)
+    gy, gx = np.gradient(gris)
+    norme = np.hypot(gx, gy)
+    orientations, _ = np.histogram(np.arctan2(gy, gx), nbBins, (-np.pi, np.pi),
+                                   weights=norme)
+    total = orientations.sum()
+    if total > 0:
+        orientations = orientations / total
+    stats = [np.abs(gx).mean(), np.abs(gx).std(), np.abs(gy).mean(),
+             np.abs(gy).std(), norme.mean(), norme.std()]
+    return np.concatenate([stats, orientations])
+
+enregistrerExtracteur('pixels', extracteurPixels)
+enregistrerExtracteur('histoRGB', extracteurHistoRGB)
+enregistrerExtracteur('histoHSV', extracteurHistoHSV)
+enregistrerExtracteur('grille', extracteurGrille)
+enregistrerExtracteur('gradients', extracteurGradients)
+
+# Decode une seule fois l'image contenue dans le fichier filename et lui
+# applique chacun des extracteurs.
+# extracteurs : dictionnaire nom du resultat -> nom d'extracteur, ou
+# couple (nom d'extracteur, dictionnaire de parametres), par exemple
+#   {'pix50': ('pixels', {'npix': 50}), 'rgb': 'histoRGB',
+#    'grille': ('grille', {'grille': 3})}
+# Renvoie le dictionnaire nom du resultat -> vecteur.
+def imageToCaracteristiques(filename, extracteurs):
+    im = Image.open(filename).convert('RGB')
+    res = {}
+    for nom, extracteur in extracteurs.items():
+        if isinstance(extracteur, tuple):
+            extracteur, parametres = extracteur
+        else:
+            parametres = {}
+        res[nom] = EXTRACTEURS[extracteur](im, **parametres)
+    return res
+
+# Charge les images du rep1 (classe t1) et du rep2 (classe t2) en calculant
+# toutes les representations demandees en une seule passe (un decodage par
+# image).
+# extracteurs : voir imageToCaracteristiques
+# debut, nbProcessus : voir chargementPyramideImages
+# n = nb total d'exemples
+# data = dictionnaire nom du resultat -> matrice (n, d) de type dtype
+# target = vecteur des classes
+def chargementPipeline(rep1, rep2, t1, t2, extracteurs, debut=0,
+                       nbProcessus=None, dtype=np.float32):
+    fichiers = fichiersDeuxClasses(rep1, rep2, t1, t2, debut)
+    n = len(fichiers)
+    target = np.array([t for _, t in fichiers])
+    if not n:
+        return n, {}, target
+    # la premiere image fixe la taille de chaque representation
+    premiere = imageToCaracteristiques(fichiers[0][0], extracteurs)
+    data = {}
+    for nom, vec in premiere.items():
+        data[nom] = np.empty((n, vec.size), dtype)
+        data[nom][0] = vec
+    extraireFichiers(partial(imageToCaracteristiques, extracteurs=extracteurs),
+                     [nf for nf, _ in fichiers[1:]], nbProcessus,
+                     dict((nom, m[1:]) for nom, m in data.items()))
+    return n, data, target
+
 # Chargement de la representation vectorielle couleur des images tests
-def importVecteursTest(nf):
-	return load(nf)
+# Si mmap est vrai, le fichier est projete en memoire en lecture seule :
+# les lignes ne sont lues sur disque qu'au moment ou elles sont utilisees.
+def importVecteursTest(nf, mmap=False):
+	return load(nf, mmap_mode='r' if mmap else None)
+
+# Predit la classe de chaque ligne de X (par ex. renvoye par
+# importVecteursTest(nf, mmap=True)) avec le classifieur deja appris
+# (toute classe ayant une methode predict, comme ceux de sklearn), par lots
+# de tailleLot lignes : seul un lot est converti en memoire a la fois.
+# dtype : type vers lequel chaque lot est converti (None = type de X)
+# Si sortie est donne, les predictions sont ecrites au fur et a mesure dans
+# ce fichier .npy, projete en memoire, qui est renvoye ; sinon elles sont
+# renvoyees dans un vecteur numpy.
+def predireParLots(classifieur, X, tailleLot=1024, sortie=None, dtype=None):
+    n = X.shape[0]
+    predictions = None
+    for debut in range(0, n, tailleLot):
+        pred = np.asarray(classifieur.predict(np.asarray(X[debut:debut+tailleLot], dtype)))
+        if predictions is None:
+            if sortie is None:
+                predictions = np.empty(n, pred.dtype)
+            else:
+                predictions = np.lib.format.open_memmap(sortie, 'w+', pred.dtype, (n,))
+        predictions[debut:debut+len(pred)] = pred
+    if predictions is None:
+        predictions = np.empty(0)
+    elif sortie is not None:
+        predictions.flush()
+    return predictions
+
+# Commandes de gestion du cache et des fichiers pack :
+#   python tp5utils.py stats-cache Data/Mer Data/Ailleurs
+#   python tp5utils.py vider-cache Data/Mer Data/Ailleurs
+#   python tp5utils.py pack pixels50.pack Data/Mer Data/Ailleurs --sizex 50
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Outils de donnees du TP5")
+    commandes = parser.add_subparsers(dest='commande')
+    for nom, aide in (('stats-cache', "affiche l'occupation du cache"),
+                      ('vider-cache', "supprime le cache")):
+        c = commandes.add_parser(nom, help=aide)
+        c.add_argument('reps', nargs='+', help="repertoires d'images")
+    c = commandes.add_parser('pack', help="ecrit les caracteristiques dans un fichier pack")
+    c.add_argument('fichier', help="fichier pack a ecrire")
+    c.add_argument('rep1', help="images de la classe t1")
+    c.add_argument('rep2', help="images de la classe t2")
+    c.add_argument('--classes', type=int, nargs=2, default=[1, -1],
+                   metavar=('T1', 'T2'), help="classes des deux repertoires")
+    c.add_argument('--sizex', type=int, default=None,
+                   help="cote des vecteurs de pixels (histogrammes sinon)")
+    c.add_argument('--processus', type=int, default=None,
+                   help="nb de processus (0 = nb de coeurs)")
+    args = parser.parse_args(args)
+    if args.commande == 'pack':
+        n = packerImages(args.fichier, args.rep1, args.rep2, args.classes[0],
+                         args.classes[1], args.sizex, nbProcessus=args.processus)
+        print("{} images ecrites dans {}".format(n, args.fichier))
+    elif args.commande == 'stats-cache':
+        stats = statistiquesCache(*args.reps)
+        print("{} fichiers, {:.1f} Ko".format(stats['fichiers'], stats['octets'] / 1024.0))
+    elif args.commande == 'vider-cache':
+        viderCache(*args.reps)
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())